@@ -3,51 +3,160 @@
 """A Python library for handling network address expansion (CIDR and dash notation)."""
 
 
-from struct import unpack, pack
+import operator
+from functools import lru_cache
+from weakref import WeakValueDictionary
 from socket import inet_pton, inet_ntop, AF_INET, AF_INET6
 
+try:
+    import numpy as np
+except ImportError:
+    np = None # Array helpers are unavailable without numpy
+
+_V4_MAX = 0xFFFFFFFF
+_LO64   = (1 << 64) - 1 # Mask for the low 64 bits of an IPv6 integer
+
+_HOSTMASK_V4 = tuple((1 << b) - 1 for b in range(33))  # Host bit masks indexed by host bit count
+_HOSTMASK_V6 = tuple((1 << b) - 1 for b in range(129))
+_OCTETS      = tuple(str(i) for i in range(256))  # Decimal text for each IPv4 octet value
+
+
+def _require_numpy():
+    """Raise an ImportError when an array helper is used without numpy installed."""
+    if np is None:
+        raise ImportError("numpy is required for IP address array support")
+
+
+def _arange(lo, version, start, stop, step):
+    """Build an array of the IPs at offsets start:stop:step from lo.
+
+    IPv4 returns a uint32 array. IPv6 returns an (N, 2) uint64 array of the
+    high and low 64-bit halves of each address.
+    """
+    _require_numpy()
+    if version == 4:
+        return np.arange(lo + start, lo + stop, step, dtype=np.uint32)
+
+    count = max(0, -((start - stop) // step))  # len(range(...)) without the ssize_t limit
+    if count == 0:
+        return np.empty((0, 2), dtype=np.uint64)
+
+    span = (count - 1) * step  # Offset of the last selected IP from the first
+    if abs(span) > _LO64:
+        raise ValueError("slice spans more than 2**64 addresses")
+
+    base    = lo + start + min(span, 0)  # Lowest selected IP, so every offset is non-negative
+    stride  = np.uint64(abs(step) if count > 1 else 0)
+    offset  = np.arange(count, dtype=np.uint64) * stride
+    if step < 0:
+        offset = offset[::-1]
+
+    base_hi = np.uint64(base >> 64)
+    base_lo = np.uint64(base & _LO64)
+    los     = offset + base_lo
+    his     = base_hi + (los < base_lo)  # Carry into the high half on overflow
+    return np.column_stack((his, los))
+
+
+def _contains_many(lo, hi, version, ips):
+    """Return a boolean mask of which IPs in an array fall within lo..hi.
+
+    IPv6 input may be integers or the (N, 2) hi/lo uint64 layout from _arange.
+    """
+    _require_numpy()
+    ips = np.asarray(ips)
+    if version == 4 or ips.ndim != 2:
+        return (ips >= lo) & (ips <= hi)
+
+    if ips.shape[1] != 2:
+        raise ValueError("IPv6 arrays must have shape (N, 2) of high and low halves")
+    ip_hi, ip_lo = ips[:, 0].astype(np.uint64), ips[:, 1].astype(np.uint64)
+    lo_hi, lo_lo = np.uint64(lo >> 64), np.uint64(lo & _LO64)
+    hi_hi, hi_lo = np.uint64(hi >> 64), np.uint64(hi & _LO64)
+    above = (ip_hi > lo_hi) | ((ip_hi == lo_hi) & (ip_lo >= lo_lo))
+    below = (ip_hi < hi_hi) | ((ip_hi == hi_hi) & (ip_lo <= hi_lo))
+    return above & below
+
+
+def _split_cidr(network, bit):
+    """Split a CIDR notation into its IP string and validated prefix length."""
+    (ip, sep, cidr) = network.partition('/')
+    if not sep:
+        raise AttributeError("cidr identifying attribute missing '/'")
+    if not 0 <= int(cidr) <= bit:
+        raise ValueError("invalid IPNetwork %s" % network)
+    return (ip, int(cidr))
+
+
+def _expand_many(ips, cidrs, los, his):
+    """Fill los/his with the bounds of each IPv4 network using numpy."""
+    bits = np.uint64(32) - cidrs.astype(np.uint64)
+    lo   = (ips >> bits) << bits
+    los[:] = lo
+    his[:] = lo | ((np.uint64(1) << bits) - np.uint64(1))
+
+
+@lru_cache(maxsize=4096)
+def _v4_to_int(ip):
+    """Parse an IPv4 string to an integer, memoizing recently seen addresses."""
+    return int.from_bytes(inet_pton(AF_INET, ip), 'big')
+
+
+@lru_cache(maxsize=4096)
+def _v6_to_int(ip):
+    """Parse an IPv6 string to an integer, memoizing recently seen addresses."""
+    return int.from_bytes(inet_pton(AF_INET6, ip), 'big')
+
 
 class Converter:
     """IP conversion methods to assisst with network expansion."""
 
-    v4_MAX = 4294967295
+    v4_MAX = _V4_MAX
     v6_MAX = 340282366920938463463374607431768211455
 
     def get_version(self, ip):
         """Fallback method to identify the IP version based on int size or oct/hextet delimeter."""
         if isinstance(ip, int):
-            return 4 if 0 <= ip <= self.v4_MAX else 6
+            return 4 if 0 <= ip <= _V4_MAX else 6
         elif isinstance(ip, str):
-            return 4 if '.' in ip else 6
+            return 6 if ':' in ip.lstrip()[:5] else 4  # A hextet is at most 4 digits, so v6 has ':' early
         return 4 # Fallback
 
     def v4_to_int(self, ip):
         """Calculate integer value for an IPv4 string."""
         try:
-            return unpack('!L', inet_pton(AF_INET, ip))[0]
+            return _v4_to_int(ip)
         except OSError:
             raise ValueError("illegal IP address %s" % ip)
 
     def v6_to_int(self, ip):
         """Calculate integer value for an IPv6 string."""
         try:
-            hi,lo = unpack('!QQ', inet_pton(AF_INET6, ip))
-            return (hi << 64) | lo
+            return _v6_to_int(ip)
         except OSError:
             raise ValueError("illegal IP address %s" % ip)
 
+    def cache_info(self):
+        """Return the parse cache statistics for each IP version."""
+        return {4: _v4_to_int.cache_info(), 6: _v6_to_int.cache_info()}
+
+    def cache_clear(self):
+        """Empty the parse caches for both IP versions."""
+        _v4_to_int.cache_clear()
+        _v6_to_int.cache_clear()
+
     def int_to_v4(self, int_):
         """Convert integer to IPv4 string."""
-        try:
-            return inet_ntop(AF_INET, pack('!L', int_))
-        except OSError:
+        if not 0 <= int_ <= _V4_MAX:
             raise ValueError("illegal IP integer %d" % int_)
+        return '.'.join((_OCTETS[int_ >> 24], _OCTETS[(int_ >> 16) & 0xFF],
+                         _OCTETS[(int_ >> 8) & 0xFF], _OCTETS[int_ & 0xFF]))
 
     def int_to_v6(self, int_):
         """Convert integer to IPv6 string."""
         try:
-            return inet_ntop(AF_INET6, pack('!QQ', int_ >> 64, int_ & (2**64 - 1)))
-        except OSError:
+            return inet_ntop(AF_INET6, int_.to_bytes(16, 'big'))
+        except (OSError, OverflowError):
             raise ValueError("illegal IP integer %d" % int_)
 
 
@@ -55,22 +164,59 @@ class Converter:
 class IPAddress(object):
     """Store IP address to represent as an int or string value."""
 
+    __slots__ = ('ip', 'version')
+
     converter = Converter()
+    _TO_INT  = {4: converter.v4_to_int, 6: converter.v6_to_int}
+    _TO_ADDR = {4: converter.int_to_v4, 6: converter.int_to_v6}
+    _CACHE   = WeakValueDictionary() # Live interned instances keyed by (version, ip)
 
     def __init__(self, ip, version=None):
-        self.ip = ip
+        self.ip = ip if type(ip) is int or isinstance(ip, str) else operator.index(ip) # Accept numpy integers from to_array()
         self.version = version or self.converter.get_version(self.ip)
-        self.int_ = int if self.version == 4 else long # Data type of int for IPv4 and long for IPv6
-        self.to_int = self.converter.v4_to_int if self.version == 4 else self.converter.v6_to_int
-        self.to_addr = self.converter.int_to_v4 if self.version == 4 else self.converter.int_to_v6
+
+    @classmethod
+    def interned(cls, ip, version=None):
+        """Return a shared IPAddress for (version, ip) while one is still referenced.
+
+        Interned instances are shared between callers and must not be mutated.
+        """
+        version = version or cls.converter.get_version(ip)
+        key = (version, ip)
+        obj = cls._CACHE.get(key)
+        if obj is None:
+            obj = cls._CACHE[key] = _InternedIPAddress(ip, version)
+        return obj
+
+    def _key(self):
+        """Return the (version, int) identity, falling back to the raw value if unparseable."""
+        try:
+            return (self.version, int(self))
+        except ValueError:
+            return (self.version, self.ip)
+
+    def __eq__(self, other):
+        if not isinstance(other, IPAddress):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
 
     def __int__(self):
         """Return the integer value of the IP address."""
-        return self.to_int(self.ip) if isinstance(self.ip, str) else self.ip
+        return self._TO_INT[self.version](self.ip) if isinstance(self.ip, str) else self.ip
 
     def __str__(self):
         """Return the string value of the IP address."""
-        return self.to_addr(self.ip) if isinstance(self.ip, self.int_) else self.ip
+        return self._TO_ADDR[self.version](self.ip) if isinstance(self.ip, int) else self.ip
+
+
+
+class _InternedIPAddress(IPAddress):
+    """IPAddress that can be weakly referenced, so only interned instances pay for the slot."""
+
+    __slots__ = ('__weakref__',)
 
 
 
@@ -81,50 +227,83 @@ class IPNetwork(object):
 
     def __init__(self, network, version=None):
         self.network = network
-        if not '/' in self.network:
-            raise AttributeError("cidr identifying attribute missing '/'")
-
         self.version = version or self.converter.get_version(self.network)
         self.to_int = self.converter.v4_to_int if self.version == 4 else self.converter.v6_to_int
         self.bit = 32 if self.version == 4 else 128 # Maximum bits for a CIDR per IP version
+        (self._ip_str, self._cidr_int) = _split_cidr(self.network, self.bit)
         self.range = self.expand()
+        self._len  = (self.range[1] + 1) - self.range[0]
 
     def __len__(self):
-        return ((self.range[1] + 1) - self.range[0])
+        return self._len
 
     def __contains__(self, ip):
-        if isinstance(ip, IPAddress):
+        if type(ip) is int:  # Most common case in batch code, checked first
+            pass
+        elif isinstance(ip, IPAddress):
             ip = int(ip)
-        elif not isinstance(ip, int):
+        elif isinstance(ip, int):  # int subclasses such as bool or IntEnum
+            pass
+        elif isinstance(ip, str):
             ip = self.to_int(ip)
+        else:
+            ip = operator.index(ip)  # Other integral types such as numpy integers
         return self.range[0] <= ip <= self.range[1]
 
+    def contains_int(self, ip):
+        """Check if an integer IP is in the range without any type dispatch."""
+        return self.range[0] <= ip <= self.range[1]
+
+    def contains_many(self, ips):
+        """Return a boolean mask of which IPs in an array (integers, or to_array() output) are in the range."""
+        return _contains_many(self.range[0], self.range[1], self.version, ips)
+
     def __iter__(self):
         return self.iter_()
 
+    def to_array(self, index=slice(None)):
+        """Return the IPs selected by a slice as a numpy array of integers."""
+        if not isinstance(index, slice):
+            raise TypeError('unsupported index type %r' % index)
+        (start, stop, step) = index.indices(self._len)
+        return _arange(self.range[0], self.version, start, stop, step)
+
+    def packed_bytes(self):
+        """Return every IP as concatenated big-endian packed bytes (4 per IPv4, 16 per IPv6)."""
+        if self.version == 4:
+            _require_numpy()
+            return np.arange(self.range[0], self.range[1] + 1, dtype='>u4').tobytes()
+
+        array = _arange(self.range[0], self.version, 0, self._len, 1)
+        if np.little_endian:
+            array.byteswap(inplace=True)  # Swap to network byte order without a copy
+        return array.tobytes()
+
     def __getitem__(self, index):
         item = None
+        (lo, hi) = self.range
+        length = self._len
 
         if hasattr(index, 'indices'):
-            (start, stop, step) = index.indices(self.__len__())
+            (start, stop, step) = index.indices(length)
 
             if (start + step < 0) or (step > stop):
-                item = [IPAddress(self.range[0], self.version)]
+                item = [IPAddress(lo, self.version)]
 
             else:
-                start = self.range[0] + start
-                stop = self.range[0] + stop
+                start = lo + start
+                stop = lo + stop
                 item = [IPAddress(x, self.version) for x in range(start, stop, step)]
 
         else:
             try:
                 index = int(index)
 
-                if (-self.__len__()) <= index < 0:        # Negative index
-                    item = IPAddress((self.range[1] + index + 1), self.version)
+                if (-length) <= index < 0:        # Negative index
+                    item = IPAddress((hi + index + 1), self.version)
 
-                elif 0 <= index <= (self.__len__() - 1):  # Positive or zero index
-                    item = IPAddress((self.range[0] + index), self.version)
+                elif 0 <= index <= (length - 1):  # Positive or zero index
+                    item = IPAddress((lo + index), self.version)
 
                 else:
                     raise IndexError('index out range')
@@ -136,27 +315,40 @@ class IPNetwork(object):
 
     def expand(self):
         """ Expand a CIDR notation to the full range. """
-        ip,cidr = self.network.split('/')
-        if int(cidr) > self.bit:
-            raise ValueError("invalid IPNetwork %s" % self.network)
-
-        bits = self.bit - int(cidr)    # Max CIDR bits based on IP version
-        ip   = self.to_int(ip)
-        lo   = (ip >> bits) << bits
-        hi   = lo | ((1 << bits) - 1)  # Subtract 1 to keep the range correct
+        bits = self.bit - self._cidr_int  # Max CIDR bits based on IP version
+        mask = _HOSTMASK_V4[bits] if self.version == 4 else _HOSTMASK_V6[bits]
+        ip   = self.to_int(self._ip_str)
+        lo   = ip & ~mask
+        hi   = ip | mask
         return (lo,hi)
 
+    @classmethod
+    def expand_many(cls, networks):
+        """ Expand many IPv4 CIDR notations at once into arrays of low and high IPs. """
+        _require_numpy()
+        networks = list(networks)
+        ips      = np.empty(len(networks), dtype=np.uint64)
+        cidrs    = np.empty(len(networks), dtype=np.uint8)
+
+        for i, network in enumerate(networks):
+            (ip, cidr) = _split_cidr(network, 32)
+            ips[i]   = cls.converter.v4_to_int(ip)
+            cidrs[i] = cidr
+
+        los = np.empty(len(networks), dtype=np.uint32)
+        his = np.empty(len(networks), dtype=np.uint32)
+        _expand_many(ips, cidrs, los, his)
+        return (los,his)
+
     def iter_(self):
-        start = self.range[0]
-        stop  = self.range[1]
-        index = 0
+        (lo, hi), version = self.range, self.version  # Bind to locals for the hot loop
+        IPA = IPAddress
+        for ip in range(lo, hi + 1):
+            yield IPA(ip, version)  # Yield each IP address - this helps with memory
 
-        while True:
-            ip = start + index
-            index += 1
-            if ip > stop:
-                break
-            yield IPAddress(ip, self.version)  # Yield each IP address - this helps with memory
+    def iter_ints(self):
+        """Iterate the integer value of each IP without creating IPAddress objects."""
+        return iter(range(self.range[0], self.range[1] + 1))
 
 
 
@@ -173,7 +365,8 @@ class IPRange(object):
         self.to_int = self.converter.v4_to_int if self.version == 4 else self.converter.v6_to_int
 
         if range_:
-            if not '-' in range_:
+            (self._start_str, sep, self._stop_str) = range_.partition('-')
+            if not sep:
                 raise AttributeError("range identifying attribute missing '-'")
             self.range = self.expand()
 
@@ -183,42 +376,78 @@ class IPRange(object):
         else:
             raise ValueError("missing parameter for IPRange initialization")
 
+        self._len = (self.range[1] + 1) - self.range[0]
+
     def __len__(self):
-        return ((self.range[1] + 1) - self.range[0])
+        return self._len
 
     def __contains__(self, ip):
-        if isinstance(ip, IPAddress):
+        if type(ip) is int:  # Most common case in batch code, checked first
+            pass
+        elif isinstance(ip, IPAddress):
             ip = int(ip)
-        elif not isinstance(ip, int):
+        elif isinstance(ip, int):  # int subclasses such as bool or IntEnum
+            pass
+        elif isinstance(ip, str):
             ip = self.to_int(ip)
+        else:
+            ip = operator.index(ip)  # Other integral types such as numpy integers
+        return self.range[0] <= ip <= self.range[1]
+
+    def contains_int(self, ip):
+        """Check if an integer IP is in the range without any type dispatch."""
         return self.range[0] <= ip <= self.range[1]
 
+    def contains_many(self, ips):
+        """Return a boolean mask of which IPs in an array (integers, or to_array() output) are in the range."""
+        return _contains_many(self.range[0], self.range[1], self.version, ips)
+
     def __iter__(self):
         return self.iter_()
 
+    def to_array(self, index=slice(None)):
+        """Return the IPs selected by a slice as a numpy array of integers."""
+        if not isinstance(index, slice):
+            raise TypeError('unsupported index type %r' % index)
+        (start, stop, step) = index.indices(self._len)
+        return _arange(self.range[0], self.version, start, stop, step)
+
+    def packed_bytes(self):
+        """Return every IP as concatenated big-endian packed bytes (4 per IPv4, 16 per IPv6)."""
+        if self.version == 4:
+            _require_numpy()
+            return np.arange(self.range[0], self.range[1] + 1, dtype='>u4').tobytes()
+
+        array = _arange(self.range[0], self.version, 0, self._len, 1)
+        if np.little_endian:
+            array.byteswap(inplace=True)  # Swap to network byte order without a copy
+        return array.tobytes()
+
     def __getitem__(self, index):
         item = None
+        (lo, hi) = self.range
+        length = self._len
 
         if hasattr(index, 'indices'):
-            (start, stop, step) = index.indices(self.__len__())
+            (start, stop, step) = index.indices(length)
 
             if (start + step < 0) or (step > stop):
-                item = [IPAddress(self.range[0], self.version)]
+                item = [IPAddress(lo, self.version)]
 
             else:
-                start = self.range[0] + start
-                stop = self.range[0] + stop
+                start = lo + start
+                stop = lo + stop
                 item = [IPAddress(x, self.version) for x in range(start, stop, step)]
 
         else:
             try:
                 index = int(index)
 
-                if (-self.__len__()) <= index < 0:        # Negative index
-                    item = IPAddress((self.range[1] + index + 1), self.version)
+                if (-length) <= index < 0:        # Negative index
+                    item = IPAddress((hi + index + 1), self.version)
 
-                elif 0 <= index <= (self.__len__() - 1):  # Positive or zero index
-                    item = IPAddress((self.range[0] + index), self.version)
+                elif 0 <= index <= (length - 1):  # Positive or zero index
+                    item = IPAddress((lo + index), self.version)
 
                 else:
                     raise IndexError('index out range')
@@ -230,22 +459,55 @@ class IPRange(object):
 
     def expand(self):
         """ Expand a dash notation to full range. """
-        start,end = self.range_.split('-')
-        lo = self.to_int(start.strip())
-        hi = self.to_int(end.strip())
+        lo = self.to_int(self._start_str.strip())
+        hi = self.to_int(self._stop_str.strip())
         if hi < lo:
             raise ValueError("lower bound IP greater than upper bound")
 
         return (lo,hi)
 
     def iter_(self):
-        start = self.range[0]
-        stop  = self.range[1]
-        index = 0
-
-        while True:
-            ip = start + index
-            index += 1
-            if ip > stop:
-                break
-            yield IPAddress(ip, self.version)  # Yield each IP address - this helps with memory
\ No newline at end of file
+        (lo, hi), version = self.range, self.version  # Bind to locals for the hot loop
+        IPA = IPAddress
+        for ip in range(lo, hi + 1):
+            yield IPA(ip, version)  # Yield each IP address - this helps with memory
+
+    def iter_ints(self):
+        """Iterate the integer value of each IP without creating IPAddress objects."""
+        return iter(range(self.range[0], self.range[1] + 1))
+
+
+
+class IPNetworkArray(object):
+    """Store many IPv4 networks as sorted arrays of low and high IPs for fast membership checks."""
+
+    converter = Converter()
+
+    def __init__(self, networks):
+        los,his = IPNetwork.expand_many(networks)
+        order = np.argsort(los, kind='stable')
+        self.los = los[order]
+        self.his = np.maximum.accumulate(his[order]) # Running max keeps overlapping networks searchable
+
+    def __len__(self):
+        return len(self.los)
+
+    def __contains__(self, ip):
+        if type(ip) is int:
+            pass
+        elif isinstance(ip, IPAddress):
+            ip = int(ip)
+        elif isinstance(ip, int):  # int subclasses such as bool or IntEnum
+            pass
+        elif isinstance(ip, str):
+            ip = self.converter.v4_to_int(ip)
+        else:
+            ip = operator.index(ip)  # Other integral types such as numpy integers
+        return self.contains_int(ip)
+
+    def contains_int(self, ip):
+        """Check if an IPv4 integer falls within any of the stored networks."""
+        if not 0 <= ip <= _V4_MAX:
+            return False
+        index = np.searchsorted(self.los, ip, side='right') - 1
+        return bool(index >= 0 and ip <= self.his[index])
\ No newline at end of file